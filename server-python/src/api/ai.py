@@ -4,9 +4,8 @@ from langchain_core.messages import HumanMessage, SystemMessage, ToolMessage
 
 from src.services.chat_model import get_chat_model_service
 from src.services.memory import get_memory_service
-from src.services.rag import get_rag_service
+from src.services.rag import get_ready_rag_service
 from src.services.guardrail import get_guardrail
-from src.services.tools import ALL_TOOLS
 from src.services.structured_output import get_structured_service, Report, CodeReview
 
 router = APIRouter(prefix="/ai", tags=["AI"])
@@ -21,27 +20,13 @@ Please solve users' programming problems using professional language.
 
 
 async def build_rag_context(query: str) -> str:
-    rag_service = get_rag_service()
-
-    results = await rag_service.retrieve_with_score(query, k=3, score_threshold=0.3)
-
-    if not results:
-        print(f"[RAG] no relevant documents found for query: {query}")
+    rag_service = get_ready_rag_service()
+    if rag_service is None:
+        # 索引仍在后台加载，先以无上下文模式回答
+        print("[RAG] index not ready, answering without context")
         return ""
 
-    print(f"[RAG] found {len(results)} relevant documents")
-
-    # 拼接检索到的文档内容
-    context_parts = [
-        "here are some relevant documents that might help answer the question:"
-    ]
-    for i, (doc, score) in enumerate(results, 1):
-        source = doc.metadata.get("source", "unknown")
-        context_parts.append(
-            f"\n--- 文档 {i} (similarity: {score:.2f}, source: {source}) ---\n{doc.page_content}"
-        )
-
-    return "\n".join(context_parts)
+    return await rag_service.build_context(query)
 
 
 @router.get("/chat/sync")
@@ -145,6 +130,9 @@ async def chat_stream(
 async def chat_with_tools(
     message: str = Query(..., description="用户消息"),
 ):
+    # langchain_core.tools 导入较慢，只在调用工具接口时加载
+    from src.services.tools import ALL_TOOLS
+
     chat_service = get_chat_model_service()
     model = chat_service.get_chat_model()
 
@@ -0,0 +1,74 @@
+import argparse
+import subprocess
+import sys
+
+# 按依赖顺序排列，每个模块在独立的子进程中导入，互不影响
+MODULES = [
+    "fastapi",
+    "langchain_core.messages",
+    "langchain_ollama",
+    "langchain_community.vectorstores",
+    "faiss",
+    "src.services.rag",
+    "src.api.ai",
+    "src.main",
+]
+
+TIMER = """
+import time
+start = time.perf_counter()
+import {module}
+print(time.perf_counter() - start)
+"""
+
+
+def measure(module: str, repeat: int) -> float:
+    """冷启动导入耗时（毫秒），取多次中的最小值"""
+    best = float("inf")
+    for _ in range(repeat):
+        result = subprocess.run(
+            [sys.executable, "-W", "ignore", "-c", TIMER.format(module=module)],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        best = min(best, float(result.stdout.strip().splitlines()[-1]) * 1000)
+    return best
+
+
+def slowest_imports(module: str, top: int) -> list[tuple[str, int]]:
+    """使用 -X importtime 找出导入 module 时自身耗时最多的模块"""
+    result = subprocess.run(
+        [sys.executable, "-W", "ignore", "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    # import time: self [us] | cumulative | imported package
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line.removeprefix("import time:").split("|")
+        entries.append((name.strip(), int(self_us)))
+    return sorted(entries, key=lambda e: e[1], reverse=True)[:top]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="startup time benchmark")
+    parser.add_argument("--repeat", type=int, default=3, help="每个模块的测量次数")
+    parser.add_argument("--top", type=int, default=10, help="导入 src.main 时最慢的模块数")
+    args = parser.parse_args()
+
+    print(f"{'module':<36}{'import (ms)':>12}")
+    for module in MODULES:
+        try:
+            elapsed = measure(module, args.repeat)
+        except subprocess.CalledProcessError:
+            print(f"{module:<36}{'failed':>12}")
+            continue
+        print(f"{module:<36}{elapsed:>12.1f}")
+
+    print("\nslowest modules imported by src.main (self time):")
+    for name, self_us in slowest_imports("src.main", args.top):
+        print(f"  {name:<50}{self_us / 1000:>8.1f} ms")
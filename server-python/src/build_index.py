@@ -0,0 +1,52 @@
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from src.core.config import get_settings  # noqa: E402
+from src.services.rag import get_rag_service  # noqa: E402
+
+
+def load_top_queries(path: str) -> list[str]:
+    file_path = Path(path)
+    if not file_path.exists():
+        return []
+    lines = file_path.read_text(encoding="utf-8").splitlines()
+    return [line.strip() for line in lines if line.strip()]
+
+
+async def build(
+    docs_path: str | None = None, queries_path: str | None = None
+) -> str | None:
+    """
+    构建索引并发布为新版本，同时为热门问题预先计算上下文
+
+    运行中的 worker 会在下一次轮询时切换到新版本
+    """
+    rag_service = get_rag_service()
+    vector_store = await rag_service.build_vector_store(docs_path)
+    if vector_store is None:
+        return None
+
+    queries = load_top_queries(queries_path or get_settings().rag_top_queries_path)
+    contexts = await rag_service.precompute_contexts(vector_store, queries)
+    if contexts:
+        print(f"Precomputed contexts for {len(contexts)} top queries")
+
+    version = rag_service.index_store.publish(vector_store, contexts)
+    print(f"RAG index published: {version} -> {rag_service.index_store.index_dir}")
+    return version
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="build RAG index for workers")
+    parser.add_argument("--docs-path", default=None, help="文档目录")
+    parser.add_argument("--queries-path", default=None, help="热门问题列表，每行一个")
+    args = parser.parse_args()
+
+    if asyncio.run(build(args.docs_path, args.queries_path)) is None:
+        sys.exit(1)
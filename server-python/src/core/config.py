@@ -16,6 +16,47 @@ class Settings:
         # 服务器配置
         self.server_host: str = os.getenv("SERVER_HOST", "0.0.0.0")
         self.server_port: int = int(os.getenv("SERVER_PORT", "8000"))
+        # 生产模式下的 worker 进程数
+        self.server_workers: int = int(os.getenv("SERVER_WORKERS", "4"))
+
+        # RAG 配置
+        self.rag_docs_path: str = os.getenv(
+            "RAG_DOCS_PATH", os.path.join(os.getcwd(), "resources", "docs")
+        )
+        # 构建好的索引目录，worker 以只读 mmap 方式加载
+        self.rag_index_dir: str = os.getenv(
+            "RAG_INDEX_DIR", os.path.join(os.getcwd(), "resources", "index")
+        )
+        # 保留的历史索引版本数，避免还在使用旧版本的 worker 读到已删除的文件
+        self.rag_index_keep_versions: int = int(
+            os.getenv("RAG_INDEX_KEEP_VERSIONS", "3")
+        )
+        # 文档切分：按 token 计算 chunk 大小和重叠量
+        self.rag_chunk_tokens: int = int(os.getenv("RAG_CHUNK_TOKENS", "300"))
+        self.rag_chunk_overlap_tokens: int = int(
+            os.getenv("RAG_CHUNK_OVERLAP_TOKENS", "32")
+        )
+        # 近似重复 chunk 的 SimHash 汉明距离阈值，-1 关闭去重
+        self.rag_dedup_distance: int = int(os.getenv("RAG_DEDUP_DISTANCE", "3"))
+        # 检索参数
+        self.rag_top_k: int = int(os.getenv("RAG_TOP_K", "3"))
+        self.rag_score_threshold: float = float(os.getenv("RAG_SCORE_THRESHOLD", "0.3"))
+        # 检索结果缓存，按 (索引版本, 规范化后的问题) 缓存拼接好的上下文
+        self.rag_cache_size: int = int(os.getenv("RAG_CACHE_SIZE", "1024"))
+        self.rag_cache_ttl: float = float(os.getenv("RAG_CACHE_TTL", "600"))
+        # 热门问题列表，每行一个，构建索引时预先计算上下文
+        self.rag_top_queries_path: str = os.getenv(
+            "RAG_TOP_QUERIES_PATH",
+            os.path.join(os.getcwd(), "resources", "top_queries.txt"),
+        )
+        # worker 检查索引新版本的间隔（秒）
+        self.rag_index_poll_interval: float = float(
+            os.getenv("RAG_INDEX_POLL_INTERVAL", "5")
+        )
+        # 没有预构建索引时是否在进程内构建，仅用于开发环境，src.serve 会关闭
+        self.rag_build_in_process: bool = (
+            os.getenv("RAG_BUILD_IN_PROCESS", "true").lower() == "true"
+        )
 
 
 @lru_cache()
@@ -1,10 +1,11 @@
+import asyncio
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 from src.api.ai import router as ai_router
-from src.services.rag import get_rag_service
+from src.services.rag import get_rag_status, start_rag_service
 
 load_dotenv()
 
@@ -20,12 +21,13 @@ async def lifespan(app: FastAPI):
     - yield 之后：关闭时执行（清理）
     """
     print("Starting server...")
-    rag_service = get_rag_service()
-    await rag_service.init()
+    # RAG 索引在后台加载，服务立即开始接收请求，/ai/chat 在索引就绪前不带上下文
+    rag_task = asyncio.create_task(start_rag_service())
 
     yield  # 应用运行中
 
     print("Shutting down...")
+    rag_task.cancel()
 
 
 app = FastAPI(
@@ -53,6 +55,26 @@ async def root():
     return {"message": "LLM-craft Server with FastAPI is running!", "status": "ok"}
 
 
+@app.get("/healthz")
+async def liveness():
+    """存活探针：进程能处理请求即可"""
+    return {"status": "ok"}
+
+
+@app.get("/readyz")
+async def readiness(response: Response, require_rag: bool = False):
+    """
+    就绪探针，分阶段：
+    - 默认：可以处理非 RAG 请求即就绪
+    - require_rag=true：RAG 索引加载完成才就绪
+    """
+    rag_status = get_rag_status()
+    if require_rag and rag_status != "ready":
+        response.status_code = 503
+        return {"status": "not ready", "rag": rag_status}
+    return {"status": "ready", "rag": rag_status}
+
+
 @app.get("/hello")
 async def hello(name: str = "World"):
     return {"message": f"Hello, {name}!"}
@@ -65,7 +87,7 @@ if __name__ == "__main__":
     host = os.getenv("SERVER_HOST", "0.0.0.0")
     port = int(os.getenv("SERVER_PORT", "8000"))
 
-    # reload=True 代码修改后自动重启
+    # reload=True 代码修改后自动重启，生产环境使用 src.serve
     uvicorn.run(
         "main:app",
         host=host,
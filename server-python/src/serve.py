@@ -0,0 +1,23 @@
+import os
+
+import uvicorn
+from dotenv import load_dotenv
+
+from src.core.config import get_settings
+
+load_dotenv()
+
+
+if __name__ == "__main__":
+    # worker 进程继承环境变量：不在进程内构建索引，只加载 src.build_index 的产物
+    os.environ["RAG_BUILD_IN_PROCESS"] = "false"
+    settings = get_settings()
+
+    # 多 worker、无 reload，索引由 src.build_index 预先构建，各 worker 只读 mmap 共享
+    uvicorn.run(
+        "src.main:app",
+        host=settings.server_host,
+        port=settings.server_port,
+        workers=settings.server_workers,
+        reload=False,
+    )
@@ -1,18 +1,24 @@
-from langchain_ollama import ChatOllama
-from langchain_core.language_models.chat_models import BaseChatModel
+from typing import TYPE_CHECKING
+
 from src.core.config import get_settings
 
+if TYPE_CHECKING:
+    from langchain_core.language_models.chat_models import BaseChatModel
+
 
 class ChatModelService:
     def __init__(self):
+        # 延迟导入，首次使用时才加载 langchain_ollama
+        from langchain_ollama import ChatOllama
+
         settings = get_settings()
 
-        self.chat_model: BaseChatModel = ChatOllama(
+        self.chat_model: "BaseChatModel" = ChatOllama(
             base_url=settings.ollama_base_url,
             model=settings.ollama_model,
         )
 
-        self.streaming_model: BaseChatModel = ChatOllama(
+        self.streaming_model: "BaseChatModel" = ChatOllama(
             base_url=settings.ollama_base_url,
             model=settings.ollama_model,
             streaming=True,  # type: ignore
@@ -22,10 +28,10 @@ class ChatModelService:
             f"ChatModel initialized: {settings.ollama_model} at {settings.ollama_base_url}"
         )
 
-    def get_chat_model(self) -> BaseChatModel:
+    def get_chat_model(self) -> "BaseChatModel":
         return self.chat_model
 
-    def get_streaming_model(self) -> BaseChatModel:
+    def get_streaming_model(self) -> "BaseChatModel":
         return self.streaming_model
 
 
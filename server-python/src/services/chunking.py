@@ -0,0 +1,301 @@
+import hashlib
+import re
+from dataclasses import dataclass
+
+from langchain_core.documents import Document
+
+# 近似 token：单个 CJK 字符、连续的字母数字、单个标点各算一个 token
+# \w 本身也匹配 CJK，字母数字分支需要排除，否则中英混排时整段中文只算一个 token
+CJK = r"\u3040-\u30ff\u3400-\u9fff\uac00-\ud7af"
+TOKEN_PATTERN = re.compile(rf"[{CJK}]|[^\W{CJK}]+|[^\w\s]")
+HEADING_PATTERN = re.compile(r"^(#{1,6})\s+(.+?)\s*#*\s*$")
+FENCE_PATTERN = re.compile(r"^\s*(```|~~~)")
+# BIT_TABLES[b] 把字节映射为其第 b 位的值，供 bytes.translate 使用
+BIT_TABLES = [bytes(v >> b & 1 for v in range(256)) for b in range(8)]
+
+
+def count_tokens(text: str) -> int:
+    return len(TOKEN_PATTERN.findall(text))
+
+
+def tail_tokens(text: str, n: int) -> str:
+    """返回 text 末尾约 n 个 token 的原文，用于 chunk 之间的重叠"""
+    if n <= 0:
+        return ""
+    spans = [m.start() for m in TOKEN_PATTERN.finditer(text)]
+    if len(spans) <= n:
+        return text
+    return text[spans[-n] :]
+
+
+def simhash(text: str, bits: int = 64) -> int:
+    tokens = [t.lower() for t in TOKEN_PATTERN.findall(text)]
+    # 3-gram shingle，比单个 token 更能反映语序
+    shingles = [" ".join(tokens[i : i + 3]) for i in range(max(len(tokens) - 2, 1))]
+
+    size = bits // 8
+    digests = [
+        hashlib.blake2b(shingle.encode("utf-8"), digest_size=size).digest()
+        for shingle in shingles
+    ]
+
+    # 按字节列统计：取出所有哈希的第 j 个字节，用查表把每一位映射成 0/1 后计数，
+    # 全部在 C 层完成，不再逐个哈希逐位累加
+    joined = b"".join(digests)
+    fingerprint = 0
+    for j in range(size):
+        column = joined[j::size]
+        for b in range(8):
+            # 该位为 1 的哈希多于一半时指纹该位为 1（哈希按大端序解释）
+            if column.translate(BIT_TABLES[b]).count(1) * 2 > len(digests):
+                fingerprint |= 1 << ((size - 1 - j) * 8 + b)
+
+    return fingerprint
+
+
+@dataclass
+class Block:
+    text: str
+    tokens: int
+    # 代码块不参与重叠，避免 chunk 中出现不完整的代码围栏
+    is_code: bool = False
+    is_heading: bool = False
+
+
+@dataclass
+class Section:
+    headings: list[str]
+    blocks: list[Block]
+
+
+class MarkdownChunker:
+    """
+    按 Markdown 结构切分文档
+
+    - 以标题划分章节，chunk 不跨章节，标题路径写入 metadata["heading_path"]
+    - 段落、代码块作为整体打包，超长时才按行切分，代码块切分后重新补齐围栏
+    - 按 token 计算大小，重叠量可配置
+    - 使用 SimHash 去除近似重复的 chunk，减少向量数量
+    """
+
+    def __init__(
+        self,
+        chunk_tokens: int = 300,
+        overlap_tokens: int = 32,
+        dedup_distance: int = 3,
+    ):
+        if chunk_tokens < 1:
+            raise ValueError(f"chunk_tokens must be positive, got {chunk_tokens}")
+        if overlap_tokens < 0:
+            raise ValueError(
+                f"overlap_tokens must not be negative, got {overlap_tokens}"
+            )
+
+        self.chunk_tokens = chunk_tokens
+        self.overlap_tokens = min(overlap_tokens, chunk_tokens // 2)
+        # 汉明距离阈值，小于 0 时不去重
+        self.dedup_distance = dedup_distance
+
+    def split_documents(self, documents: list[Document]) -> list[Document]:
+        chunks = []
+        for document in documents:
+            source = str(document.metadata.get("source", ""))
+            markdown = source.endswith(".md")
+            for section in self._parse(document.page_content, markdown):
+                heading_path = " > ".join(section.headings)
+                for text in self._pack(section.blocks):
+                    metadata = {**document.metadata, "heading_path": heading_path}
+                    chunks.append(Document(page_content=text, metadata=metadata))
+
+        if self.dedup_distance < 0:
+            return chunks
+
+        unique = self._deduplicate(chunks)
+        if len(unique) < len(chunks):
+            print(f"  Removed {len(chunks) - len(unique)} near-duplicate chunks")
+        return unique
+
+    def _parse(self, text: str, markdown: bool) -> list[Section]:
+        sections: list[Section] = []
+        headings: list[str] = []
+        blocks: list[Block] = []
+        paragraph: list[str] = []
+        code: list[str] | None = None
+
+        def flush_paragraph():
+            if paragraph:
+                content = "\n".join(paragraph).strip()
+                if content:
+                    blocks.append(Block(content, count_tokens(content)))
+                paragraph.clear()
+
+        def flush_section():
+            flush_paragraph()
+            if blocks:
+                sections.append(Section(list(headings), list(blocks)))
+                blocks.clear()
+
+        for line in text.splitlines():
+            if code is not None:
+                code.append(line)
+                if FENCE_PATTERN.match(line):
+                    content = "\n".join(code)
+                    blocks.append(Block(content, count_tokens(content), is_code=True))
+                    code = None
+                continue
+
+            if markdown and FENCE_PATTERN.match(line):
+                flush_paragraph()
+                code = [line]
+                continue
+
+            heading = HEADING_PATTERN.match(line) if markdown else None
+            if heading:
+                flush_section()
+                level = len(heading.group(1))
+                headings = headings[: level - 1] + [heading.group(2)]
+                # 标题行保留在正文中，和下面的内容一起 embedding
+                blocks.append(Block(line.strip(), count_tokens(line), is_heading=True))
+                continue
+
+            if line.strip():
+                paragraph.append(line)
+            else:
+                flush_paragraph()
+
+        # 未闭合的代码块按普通代码块处理
+        if code is not None:
+            content = "\n".join(code)
+            blocks.append(Block(content, count_tokens(content), is_code=True))
+        flush_section()
+
+        # 只有标题没有正文的章节不单独成块
+        return [s for s in sections if not all(b.is_heading for b in s.blocks)]
+
+    def _pack(self, blocks: list[Block]) -> list[str]:
+        chunks: list[str] = []
+        current: list[str] = []
+        current_tokens = 0
+        last_is_code = False
+        only_headings = False
+
+        for block in self._split_oversized(blocks):
+            # 只有标题时不单独成块，标题和后面的正文放在同一个 chunk
+            if (
+                current
+                and not only_headings
+                and current_tokens + block.tokens > self.chunk_tokens
+            ):
+                chunks.append("\n\n".join(current))
+                overlap = ""
+                if not last_is_code and not block.is_code:
+                    overlap = tail_tokens(current[-1], self.overlap_tokens)
+                # 重叠部分不能让新 chunk 超出上限
+                if count_tokens(overlap) + block.tokens > self.chunk_tokens:
+                    overlap = ""
+                current = [overlap] if overlap else []
+                current_tokens = count_tokens(overlap)
+
+            only_headings = block.is_heading and (not current or only_headings)
+            current.append(block.text)
+            current_tokens += block.tokens
+            last_is_code = block.is_code
+
+        if current:
+            chunks.append("\n\n".join(current))
+        return chunks
+
+    def _split_oversized(self, blocks: list[Block]) -> list[Block]:
+        # 为章节标题预留空间，保证标题和第一段正文能放进同一个 chunk
+        heading_tokens = sum(b.tokens for b in blocks if b.is_heading)
+        limit = self.chunk_tokens - heading_tokens
+        # 切分后的片段再预留重叠量，否则重叠部分总会因超出上限被丢弃
+        budget = max(limit - self.overlap_tokens, 1)
+
+        result = []
+        for block in blocks:
+            if block.is_heading or block.tokens <= limit:
+                result.append(block)
+            elif block.is_code:
+                result.extend(self._split_code(block.text, budget))
+            else:
+                result.extend(
+                    Block(text, count_tokens(text))
+                    for text in self._split_lines(block.text.splitlines(), budget)
+                )
+        return result
+
+    def _split_code(self, text: str, max_tokens: int) -> list[Block]:
+        lines = text.splitlines()
+        opening = lines[0]
+        fence = FENCE_PATTERN.match(opening).group(1)  # type: ignore
+        body = (
+            lines[1:-1]
+            if len(lines) > 1 and FENCE_PATTERN.match(lines[-1])
+            else lines[1:]
+        )
+
+        budget = max_tokens - count_tokens(opening) - count_tokens(fence)
+        pieces = [
+            f"{opening}\n{piece}\n{fence}"
+            for piece in self._split_lines(body, max(budget, 1))
+        ]
+        return [Block(piece, count_tokens(piece), is_code=True) for piece in pieces]
+
+    def _split_lines(self, lines: list[str], max_tokens: int) -> list[str]:
+        pieces: list[str] = []
+        current: list[str] = []
+        current_tokens = 0
+
+        for line in lines:
+            tokens = count_tokens(line)
+            if tokens > max_tokens:
+                # 单行超长时按 token 硬切分
+                if current:
+                    pieces.append("\n".join(current))
+                    current, current_tokens = [], 0
+                spans = [m.start() for m in TOKEN_PATTERN.finditer(line)]
+                for i in range(0, len(spans), max_tokens):
+                    end = spans[i + max_tokens] if i + max_tokens < len(spans) else None
+                    pieces.append(line[spans[i] : end].strip())
+                continue
+
+            if current and current_tokens + tokens > max_tokens:
+                pieces.append("\n".join(current))
+                current, current_tokens = [], 0
+            current.append(line)
+            current_tokens += tokens
+
+        if current:
+            pieces.append("\n".join(current))
+        return pieces
+
+    def _deduplicate(self, chunks: list[Document]) -> list[Document]:
+        # 64 位指纹分成 dedup_distance + 1 段，汉明距离不超过阈值的两个指纹
+        # 至少有一段完全相同，只需在同段的候选中比较
+        bands = min(self.dedup_distance + 1, 64)
+        band_bits = 64 // bands
+        buckets: dict[tuple[int, int], list[int]] = {}
+        unique: list[Document] = []
+        fingerprints: list[int] = []
+
+        for chunk in chunks:
+            fingerprint = simhash(chunk.page_content)
+            keys = [
+                (i, fingerprint >> (i * band_bits) & ((1 << band_bits) - 1))
+                for i in range(bands)
+            ]
+
+            candidates = {j for key in keys for j in buckets.get(key, [])}
+            if any(
+                (fingerprint ^ fingerprints[j]).bit_count() <= self.dedup_distance
+                for j in candidates
+            ):
+                continue
+
+            for key in keys:
+                buckets.setdefault(key, []).append(len(unique))
+            fingerprints.append(fingerprint)
+            unique.append(chunk)
+
+        return unique
@@ -0,0 +1,105 @@
+import json
+import os
+import pickle
+import shutil
+from datetime import datetime
+from pathlib import Path
+
+import faiss
+from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import Embeddings
+
+CURRENT_FILE = "CURRENT"
+CONTEXTS_FILE = "contexts.json"
+
+# 只读 + mmap 加载，多个 worker 映射同一个文件时由操作系统共享物理页
+# IO_FLAG_MMAP_IFC 让 IndexFlat 的向量数据也走 mmap，旧版本 faiss 没有这个标志
+MMAP_FLAGS = (
+    faiss.IO_FLAG_MMAP
+    | faiss.IO_FLAG_READ_ONLY
+    | getattr(faiss, "IO_FLAG_MMAP_IFC", 0)
+)
+
+
+class IndexStore:
+    """
+    磁盘上的版本化 FAISS 索引
+
+    index_dir/
+      CURRENT            当前版本号，通过 os.replace 原子切换
+      <version>/
+        index.faiss      向量索引
+        index.pkl        (docstore, index_to_docstore_id)
+        contexts.json    热门问题预先计算好的上下文（可选）
+    """
+
+    def __init__(self, index_dir: str, keep_versions: int = 3):
+        self.index_dir = Path(index_dir)
+        self.keep_versions = max(keep_versions, 1)
+
+    def current_version(self) -> str | None:
+        try:
+            version = (self.index_dir / CURRENT_FILE).read_text().strip()
+        except FileNotFoundError:
+            return None
+        return version or None
+
+    def publish(
+        self, vector_store: FAISS, contexts: dict[str, str] | None = None
+    ) -> str:
+        """写入新版本并原子切换 CURRENT，返回新版本号"""
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        # 时间戳作为版本号，按名称排序即按发布顺序
+        version = datetime.now().strftime("%Y%m%d%H%M%S%f")
+
+        # 先写到临时目录，写完再 rename，worker 不会看到写了一半的版本
+        tmp_dir = self.index_dir / f".{version}.tmp"
+        vector_store.save_local(str(tmp_dir))
+        if contexts:
+            with open(tmp_dir / CONTEXTS_FILE, "w", encoding="utf-8") as f:
+                json.dump(contexts, f, ensure_ascii=False)
+        os.rename(tmp_dir, self.index_dir / version)
+
+        tmp_current = self.index_dir / f".{CURRENT_FILE}.tmp"
+        with open(tmp_current, "w") as f:
+            f.write(version)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_current, self.index_dir / CURRENT_FILE)
+
+        self._prune(version)
+        return version
+
+    def load(self, version: str, embeddings: Embeddings) -> FAISS:
+        """以只读 mmap 方式加载指定版本"""
+        version_dir = self.index_dir / version
+        index = faiss.read_index(str(version_dir / "index.faiss"), MMAP_FLAGS)
+
+        # index.pkl 由 publish 自己写入，不接受外部文件
+        with open(version_dir / "index.pkl", "rb") as f:
+            docstore, index_to_docstore_id = pickle.load(f)
+
+        return FAISS(
+            embedding_function=embeddings,
+            index=index,
+            docstore=docstore,
+            index_to_docstore_id=index_to_docstore_id,
+        )
+
+    def load_contexts(self, version: str) -> dict[str, str]:
+        try:
+            with open(self.index_dir / version / CONTEXTS_FILE, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def _prune(self, current: str):
+        versions = sorted(
+            p.name
+            for p in self.index_dir.iterdir()
+            if p.is_dir() and not p.name.startswith(".")
+        )
+        # 已被 mmap 的文件删除后映射仍然有效，只会在最后一个 worker 释放后回收
+        for version in versions[: -self.keep_versions]:
+            if version != current:
+                shutil.rmtree(self.index_dir / version, ignore_errors=True)
@@ -1,16 +1,27 @@
+import asyncio
 import os
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-from langchain_ollama import OllamaEmbeddings
-from langchain_community.vectorstores import FAISS
 from langchain_core.documents import Document
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 
 from src.core.config import get_settings
+from src.services.retrieval_cache import RetrievalCache, normalize_query
+
+CONTEXT_HEADER = "here are some relevant documents that might help answer the question:"
+
+# 重量级依赖只在类型检查时导入，运行时在构造 RagService 时才加载，加快冷启动
+if TYPE_CHECKING:
+    from langchain_community.vectorstores import FAISS
 
 
 class RagService:
     def __init__(self):
+        from langchain_ollama import OllamaEmbeddings
+
+        from src.services.chunking import MarkdownChunker
+        from src.services.index_store import IndexStore
+
         settings = get_settings()
 
         self.embeddings = OllamaEmbeddings(
@@ -19,12 +30,30 @@ class RagService:
         )
 
         # 存放文档向量，支持相似度搜索
-        self.vector_store: FAISS | None = None
+        self.vector_store: "FAISS | None" = None
+        # 当前加载的磁盘索引版本，None 表示未加载或为进程内构建的索引
+        self.index_version: str | None = None
+
+        self.docs_path = settings.rag_docs_path
+        self.index_store = IndexStore(
+            settings.rag_index_dir, settings.rag_index_keep_versions
+        )
+        self.poll_interval = settings.rag_index_poll_interval
+        self.build_in_process = settings.rag_build_in_process
+        # loading -> ready / empty / failed
+        self.status = "loading"
+
+        self.top_k = settings.rag_top_k
+        self.score_threshold = settings.rag_score_threshold
+        self.cache = RetrievalCache(settings.rag_cache_size, settings.rag_cache_ttl)
+        # 当前索引版本的热门问题上下文，由 build_index 预先计算，随索引一起切换
+        self.precomputed: dict[str, str] = {}
 
-        # 文本分割器
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=200,
+        # 按 Markdown 结构切分并去重
+        self.text_splitter = MarkdownChunker(
+            chunk_tokens=settings.rag_chunk_tokens,
+            overlap_tokens=settings.rag_chunk_overlap_tokens,
+            dedup_distance=settings.rag_dedup_distance,
         )
 
         print(
@@ -32,24 +61,88 @@ class RagService:
         )
 
     async def init(self, docs_path: str | None = None):
+        """在当前进程内构建索引，仅适合开发环境的单进程模式"""
+        vector_store = await self.build_vector_store(docs_path)
+        if vector_store is not None:
+            self._swap(vector_store, None, {})
+        elif self.vector_store is None:
+            self.status = "empty"
+
+    async def build_vector_store(self, docs_path: str | None = None) -> "FAISS | None":
+        from langchain_community.vectorstores import FAISS
+
         if docs_path is None:
-            docs_path = os.path.join(os.getcwd(), "resources", "docs")
+            docs_path = self.docs_path
 
-        documents = self._load_documents(docs_path)
+        # 读文件、切分和构建 FAISS 索引都是同步操作，放到线程中执行，
+        # 进程内构建时不阻塞事件循环，其他请求照常处理
+        documents = await asyncio.to_thread(self._load_documents, docs_path)
 
         if not documents:
             print(f"No documents found in {docs_path}")
-            return
+            return None
 
-        chunks = self.text_splitter.split_documents(documents)
+        chunks = await asyncio.to_thread(self.text_splitter.split_documents, documents)
 
         # 对每个 chunk 进行 embedding
-        self.vector_store = await FAISS.afrom_documents(
-            documents=chunks,
-            embedding=self.embeddings,
+        texts = [chunk.page_content for chunk in chunks]
+        vectors = await self.embeddings.aembed_documents(texts)
+        vector_store = await asyncio.to_thread(
+            FAISS.from_embeddings,
+            list(zip(texts, vectors)),
+            self.embeddings,
+            metadatas=[chunk.metadata for chunk in chunks],
         )
 
         print(f"RAG indexed {len(chunks)} chunks from {len(documents)} documents")
+        return vector_store
+
+    def load_index(self) -> bool:
+        """
+        加载磁盘上的最新索引版本（只读 mmap）
+
+        版本未变化时直接返回，变化时整体替换 vector_store 引用，
+        正在进行的检索继续使用旧对象，不需要加锁
+        """
+        version = self.index_store.current_version()
+        if version is None:
+            return False
+        if version == self.index_version:
+            return True
+
+        try:
+            vector_store = self.index_store.load(version, self.embeddings)
+            precomputed = self.index_store.load_contexts(version)
+        except Exception as e:
+            print(f"Failed to load RAG index {version}: {e}")
+            return self.vector_store is not None
+
+        self._swap(vector_store, version, precomputed)
+        print(
+            f"RAG index loaded: {version} with {len(precomputed)} precomputed contexts"
+            f" (pid {os.getpid()})"
+        )
+        return True
+
+    def _swap(
+        self, vector_store: "FAISS", version: str | None, precomputed: dict[str, str]
+    ):
+        self.vector_store = vector_store
+        self.index_version = version
+        self.precomputed = precomputed
+        # 缓存键中包含版本号，旧版本的条目不会再命中，这里清空释放内存
+        self.cache.clear()
+        self.status = "ready"
+
+    async def watch_index(self):
+        """定期检查 CURRENT，发现新版本后热替换，无需重启 worker"""
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await asyncio.to_thread(self.load_index)
+            except Exception as e:
+                # 单次检查失败不能让监听任务退出，否则热切换会静默停止
+                print(f"Failed to check RAG index version: {e}")
 
     def _load_documents(self, docs_path: str) -> list[Document]:
         documents = []
@@ -81,13 +174,19 @@ class RagService:
         return docs
 
     async def retrieve_with_score(
-        self, query: str, k: int = 3, score_threshold: float = 0.5
+        self,
+        query: str,
+        k: int = 3,
+        score_threshold: float = 0.5,
+        vector_store: "FAISS | None" = None,
     ) -> list[tuple[Document, float]]:
-        if self.vector_store is None:
+        if vector_store is None:
+            vector_store = self.vector_store
+        if vector_store is None:
             return []
 
         # similarity_search_with_score 返回 (doc, distance)
-        results = await self.vector_store.asimilarity_search_with_score(query, k=k)
+        results = await vector_store.asimilarity_search_with_score(query, k=k)
 
         filtered = []
         for doc, distance in results:
@@ -98,8 +197,69 @@ class RagService:
 
         return filtered
 
+    async def build_context(self, query: str) -> str:
+        """
+        检索并拼接上下文，结果按 (索引版本, 规范化后的问题) 缓存
+
+        同一个热门问题或同一会话中的重复提问不再重复 embedding 和检索
+        """
+        normalized = normalize_query(query)
+        if normalized in self.precomputed:
+            print("[RAG] precomputed context hit")
+            return self.precomputed[normalized]
+
+        # 先取版本号，检索期间发生切换时结果写入旧版本的键，不会被新版本读到
+        key = (self.index_version, normalized)
+        cached = self.cache.get(key)
+        if cached is not None:
+            print("[RAG] cache hit")
+            return cached
+
+        context = await self._retrieve_context(query, self.vector_store)
+        self.cache.set(key, context)
+        return context
+
+    async def precompute_contexts(
+        self, vector_store: "FAISS", queries: list[str]
+    ) -> dict[str, str]:
+        """为热门问题预先计算上下文，随新索引版本一起发布"""
+        contexts = {}
+        for query in queries:
+            normalized = normalize_query(query)
+            if normalized and normalized not in contexts:
+                contexts[normalized] = await self._retrieve_context(query, vector_store)
+        return contexts
+
+    async def _retrieve_context(self, query: str, vector_store: "FAISS | None") -> str:
+        results = await self.retrieve_with_score(
+            query,
+            k=self.top_k,
+            score_threshold=self.score_threshold,
+            vector_store=vector_store,
+        )
+
+        if not results:
+            print(f"[RAG] no relevant documents found for query: {query}")
+            return ""
+
+        print(f"[RAG] found {len(results)} relevant documents")
+
+        # 拼接检索到的文档内容
+        context_parts = [CONTEXT_HEADER]
+        for i, (doc, score) in enumerate(results, 1):
+            source = doc.metadata.get("source", "unknown")
+            if doc.metadata.get("heading_path"):
+                source = f"{source} > {doc.metadata['heading_path']}"
+            context_parts.append(
+                f"\n--- 文档 {i} (similarity: {score:.2f}, source: {source}) ---\n{doc.page_content}"
+            )
+
+        return "\n".join(context_parts)
+
 
 _rag_service: RagService | None = None
+# RagService 构造失败时没有实例可以记录状态，单独标记
+_rag_init_failed = False
 
 
 def get_rag_service() -> RagService:
@@ -107,3 +267,52 @@ def get_rag_service() -> RagService:
     if _rag_service is None:
         _rag_service = RagService()
     return _rag_service
+
+
+def get_ready_rag_service() -> RagService | None:
+    """索引就绪时返回 RagService，否则返回 None，不会触发初始化"""
+    if _rag_service is None or _rag_service.vector_store is None:
+        return None
+    return _rag_service
+
+
+def get_rag_status() -> str:
+    if _rag_service is None:
+        return "failed" if _rag_init_failed else "loading"
+    return _rag_service.status
+
+
+async def start_rag_service():
+    """
+    后台加载 RAG 索引，不阻塞服务启动
+
+    构造 RagService 会导入 langchain_ollama / FAISS 等模块，放到线程中执行，
+    加载完成后继续监听索引新版本
+    """
+    global _rag_init_failed
+    try:
+        rag_service = await asyncio.to_thread(get_rag_service)
+    except Exception as e:
+        _rag_init_failed = True
+        print(f"Failed to initialize RAG service: {e}")
+        return
+
+    try:
+        # 优先加载 build_index 生成的磁盘索引，没有时退回进程内构建
+        if not await asyncio.to_thread(rag_service.load_index):
+            if rag_service.build_in_process:
+                print("No prebuilt RAG index found, building in process...")
+                await rag_service.init()
+            else:
+                # 多 worker 模式下各自构建会重复 embedding 整个语料库，只等待新版本发布
+                rag_service.status = "empty"
+                print(
+                    f"[error] No prebuilt RAG index found in "
+                    f"{rag_service.index_store.index_dir}, serving without RAG. "
+                    "Run `python -m src.build_index` to build it."
+                )
+    except Exception as e:
+        rag_service.status = "failed"
+        print(f"Failed to initialize RAG index: {e}")
+
+    await rag_service.watch_index()
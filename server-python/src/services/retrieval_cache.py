@@ -0,0 +1,59 @@
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Hashable
+
+
+def normalize_query(query: str) -> str:
+    """全角转半角、忽略大小写、合并空白、去掉结尾标点，让同一问题的不同写法命中同一条缓存"""
+    query = unicodedata.normalize("NFKC", query).casefold()
+    query = re.sub(r"\s+", " ", query).strip()
+    return query.rstrip("?!.。？！ ")
+
+
+class RetrievalCache:
+    """
+    检索结果缓存（LRU + TTL）
+
+    缓存的是拼接好的上下文字符串，命中时跳过 embedding、向量检索和格式化
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: float = 600):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._store: OrderedDict[Hashable, tuple[float, str]] = OrderedDict()
+        # load_index 在线程中执行，清空缓存时需要加锁
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> str | None:
+        with self._lock:
+            entry = self._store.get(key)
+            if entry is None:
+                return None
+
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._store[key]
+                return None
+
+            self._store.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: str):
+        if self.max_size <= 0:
+            return
+
+        with self._lock:
+            self._store[key] = (time.monotonic() + self.ttl, value)
+            self._store.move_to_end(key)
+            while len(self._store) > self.max_size:
+                self._store.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._store.clear()
+
+    def __len__(self) -> int:
+        return len(self._store)